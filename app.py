@@ -2,167 +2,243 @@
 AI Fraud Detection Agent - Main Application
 Web interface for uploading and analyzing documents for fraud detection
 """
+import asyncio
+import gzip
+import logging
+import multiprocessing
 import os
-import sys
-
-
-def _maybe_reexec_with_venv():
-    """Ensure app.py runs in the local venv when available."""
-    venv_python = os.path.join(
-        os.path.dirname(__file__), ".venv312", "Scripts", "python.exe"
-    )
-    if not os.path.exists(venv_python):
-        return
-
-    already = os.environ.get("KAYA_VENV_REEXEC") == "1"
-    current = os.path.abspath(sys.executable).lower()
-    target = os.path.abspath(venv_python).lower()
-    if not already and current != target:
-        os.environ["KAYA_VENV_REEXEC"] = "1"
-        os.execv(venv_python, [venv_python] + sys.argv)
-
-
-_maybe_reexec_with_venv()
-
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from tempfile import SpooledTemporaryFile
+import aiofiles
+import orjson
+from quart import Quart, Request, Response, render_template, request, jsonify, send_file, redirect, url_for
+from quart.json.provider import DefaultJSONProvider
 from werkzeug.utils import secure_filename
 import config
 from image_tampering_detector import ImageTamperingDetector
 from pdf_analyzer import PDFAnalyzer
 from code_analyzer import CodeAnalyzer
 from report_generator import ReportGenerator
-import json
+from result_store import ResultStore
 from datetime import datetime
 
-app = Flask(__name__)
+
+# Worker processes have no app context, so they log through the module logger
+logger = logging.getLogger(__name__)
+
+
+def _spooled_stream_factory(total_content_length, content_type, filename, content_length=None):
+    """Spool multipart file parts in memory up to UPLOAD_SPOOL_SIZE before going to disk"""
+    return SpooledTemporaryFile(max_size=config.UPLOAD_SPOOL_SIZE, mode='rb+')
+
+
+class UploadRequest(Request):
+    """Request class using a larger multipart spool threshold than the 500 KB default"""
+
+    def make_form_data_parser(self):
+        parser = super().make_form_data_parser()
+        parser.stream_factory = _spooled_stream_factory
+        return parser
+
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson's C encoder instead of the stdlib json module"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str, option=_ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+app = Quart(__name__)
+app.request_class = UploadRequest
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = config.SECRET_KEY
 app.config['UPLOAD_FOLDER'] = config.UPLOAD_FOLDER
+app.config['MAX_CONTENT_LENGTH'] = config.MAX_FILE_SIZE
 
+# Create the upload, report and scratch directories before anything writes to them
+config.ensure_directories()
 
-# Global storage for analysis results
-analysis_cache = {}
 
+# Analysis results shared by every worker, and the pool running the analyses.
+# Both are created by _start_analysis once this process starts serving.
+RESULT_STORE = None
+EXECUTOR = None
 
-def allowed_file(filename, file_type='image'):
-    """Check if file extension is allowed"""
-    if file_type == 'image':
-        return '.' in filename and filename.rsplit('.', 1)[1].lower() in config.ALLOWED_IMAGE_EXTENSIONS
-    elif file_type == 'pdf':
-        return '.' in filename and filename.rsplit('.', 1)[1].lower() in config.ALLOWED_PDF_EXTENSIONS
-    elif file_type == 'code':
-        return '.' in filename and filename.rsplit('.', 1)[1].lower() in config.ALLOWED_CODE_EXTENSIONS
-    return False
+
+# Read size used when copying multipart uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Extension -> file type, built once so classification is a single dict lookup
+EXT_TO_TYPE = (
+    {ext: 'image' for ext in config.ALLOWED_IMAGE_EXTENSIONS}
+    | {ext: 'pdf' for ext in config.ALLOWED_PDF_EXTENSIONS}
+    | {ext: 'code' for ext in config.ALLOWED_CODE_EXTENSIONS}
+)
 
 
 def get_file_type(filename):
-    """Determine file type from extension"""
-    ext = filename.rsplit('.', 1)[1].lower()
-    if ext in config.ALLOWED_IMAGE_EXTENSIONS:
-        return 'image'
-    elif ext in config.ALLOWED_PDF_EXTENSIONS:
-        return 'pdf'
-    elif ext in config.ALLOWED_CODE_EXTENSIONS:
-        return 'code'
-    return None
+    """Determine file type from extension, or None if it is not allowed"""
+    _, dot, ext = filename.rpartition('.')
+    if not dot:
+        return None
+    return EXT_TO_TYPE.get(ext.lower())
+
+
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
 
 
 def get_file_size_readable(size_bytes):
     """Convert bytes to human-readable format"""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.2f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.2f} TB"
+    # Each unit is a factor of 2**10, so the bit length picks the unit directly
+    idx = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1) if size_bytes else 0
+    return f"{size_bytes / (1 << (10 * idx)):.2f} {_SIZE_UNITS[idx]}"
+
+
+@app.after_request
+async def _compress_response(response):
+    """Gzip JSON and HTML responses for clients that accept it"""
+    if (response.status_code != 200
+            or response.mimetype not in config.COMPRESS_MIMETYPES
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+
+    data = await response.get_data()
+    if len(data) < config.COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=config.COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+# Rendered HTML for the static pages, filled once per worker
+_rendered_pages = {}
+
+# /health is polled constantly by the host, so its body is fixed bytes
+HEALTH_BODY = b'{"status": "healthy"}'
+
+
+async def _render_cached(name):
+    """Render a template with no request-dependent context once and reuse it"""
+    html = _rendered_pages.get(name)
+    if html is None:
+        html = await render_template(name)
+        if not config.DEBUG:  # keep template edits live while debugging
+            _rendered_pages[name] = html
+    return html
+
+
+@app.before_serving
+async def _start_analysis():
+    """Open the result store and start the analysis pool in the serving process
+
+    Pool workers import this module to unpickle _run_analysis, so doing this at
+    import time would give each of them a store, cleanup thread and pool too.
+    """
+    global RESULT_STORE, EXECUTOR
+    # Abandoned analyses expire after the TTL
+    RESULT_STORE = ResultStore(config.ANALYSIS_DB_PATH, ttl=config.ANALYSIS_RESULT_TTL)
+    # Analyses are CPU-bound, so run them in worker processes outside the GIL.
+    # Spawned workers start clean instead of inheriting the store's SQLite handle.
+    EXECUTOR = ProcessPoolExecutor(max_workers=config.ANALYSIS_WORKERS,
+                                   mp_context=multiprocessing.get_context('spawn'))
+
+
+@app.after_serving
+async def _stop_analysis():
+    """Drop queued analyses and let the pool wind down"""
+    EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
+
+@app.before_serving
+async def _warm_page_cache():
+    """Render the static pages before the first request arrives"""
+    for name in ('index.html', 'docs.html'):
+        await _render_cached(name)
 
 
 @app.route('/')
-def index():
+async def index():
     """Main page"""
-    return render_template('index.html')
+    return await _render_cached('index.html')
 
 
 @app.route('/documentation')
-def documentation():
+async def documentation():
     """Documentation page"""
-    return render_template('docs.html')
+    return await _render_cached('docs.html')
 
 
 @app.route('/upload', methods=['POST'])
-def upload_file():
-    """Handle file upload and initiate analysis"""
+async def upload_file():
+    """Handle file upload and queue analysis"""
+    form = await request.form
+    files = await request.files
 
     # Check if it's a code text submission or file upload
-    if 'code_text' in request.form and request.form['code_text'].strip():
+    if 'code_text' in form and form['code_text'].strip():
         # Handle code text submission
-        code_text = request.form['code_text']
-        language = request.form.get('language', 'auto')
-        generate_report = request.form.get('generate_report', 'false').lower() == 'true'
+        code_text = form['code_text']
+        language = form.get('language', 'auto').lower()
+        generate_report = form.get('generate_report', 'false').lower() == 'true'
+        fast = form.get('fast', 'false').lower() == 'true'
+
+        # Reject unknown languages before anything is written
+        if language not in config.SUPPORTED_CODE_LANGUAGES:
+            return jsonify({'error': f'Unsupported language: {language}'}), 400
 
         # Save code to file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         code_filename = f"{timestamp}_code.txt"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], code_filename)
+        filepath = config.sharded_path(app.config['UPLOAD_FOLDER'], code_filename)
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(code_text)
+        # Encode once for both the size and the write. The analyzer gets the
+        # text in memory, so a copy only goes to disk alongside a report.
+        code_bytes = code_text.encode('utf-8')
+        if generate_report:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            async with aiofiles.open(filepath, 'wb') as f:
+                await f.write(code_bytes)
 
-        file_size = len(code_text.encode('utf-8'))
+        file_size = len(code_bytes)
         file_info = {
             'filename': 'Code Submission',
             'unique_filename': code_filename,
             'type': 'code',
             'size': get_file_size_readable(file_size),
             'size_bytes': file_size,
-            'upload_time': datetime.now().isoformat(),
+            'upload_time': now.isoformat(),
             'analysis_type': 'Code Analysis (AI Detection)',
             'language': language
         }
 
-        try:
-            print(f"[*] Starting code analysis for text submission")
-            analyzer = CodeAnalyzer()
-            analysis_results = analyzer.analyze_code(code_text, language)
-
-            # Add file info to results
-            analysis_results['file_info'] = file_info
-
-            # Generate report only if requested
-            if generate_report:
-                report_gen = ReportGenerator(config.REPORT_FOLDER)
-                report_path = report_gen.generate_report(analysis_results, file_info)
-                analysis_results['report_path'] = report_path
-                analysis_results['report_filename'] = os.path.basename(report_path)
-            else:
-                analysis_results['report_path'] = None
-                analysis_results['report_filename'] = None
-
-            # Cache results
-            analysis_id = code_filename
-            analysis_cache[analysis_id] = analysis_results
-
-            return jsonify({
-                'success': True,
-                'analysis_id': analysis_id,
-                'message': 'Code analysis completed successfully'
-            })
-
-        except Exception as e:
-            print(f"[-] Error during code analysis: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return jsonify({'error': f'Code analysis failed: {str(e)}'}), 500
+        app.logger.info("Queued code analysis for text submission")
+        return _queue_analysis(code_filename, filepath, 'code', file_info, generate_report,
+                               code_text=code_text, language=language, fast=fast)
 
     # Handle file upload
-    if 'file' not in request.files:
+    if 'file' not in files:
         return jsonify({'error': 'No file provided'}), 400
 
-    file = request.files['file']
+    file = files['file']
 
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
 
     # Check if report generation is requested
-    generate_report = request.form.get('generate_report', 'false').lower() == 'true'
+    generate_report = form.get('generate_report', 'false').lower() == 'true'
+    fast = form.get('fast', 'false').lower() == 'true'
 
     # Determine file type
     file_type = get_file_type(file.filename)
@@ -172,78 +248,189 @@ def upload_file():
 
     # Save file
     filename = secure_filename(file.filename)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
     unique_filename = f"{timestamp}_{filename}"
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-    file.save(filepath)
+    filepath = config.sharded_path(app.config['UPLOAD_FOLDER'], unique_filename)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+    # Reading the spooled part blocks too, so the whole copy runs off the event loop
+    file_size = await asyncio.to_thread(_save_stream, file.stream, filepath)
+
+    return _queue_saved_file(filepath, filename, unique_filename, file_type, generate_report,
+                             now, file_size, fast)
+
+
+@app.route('/upload/raw', methods=['POST'])
+async def upload_raw():
+    """Handle a raw (non-multipart) upload streamed straight to disk
+
+    The filename comes from the X-Filename header, e.g.
+    curl -XPOST -H "X-Filename: scan.pdf" --data-binary @scan.pdf /upload/raw
+    """
+    original_name = request.headers.get('X-Filename', '')
+    if not original_name:
+        return jsonify({'error': 'No filename provided (set the X-Filename header)'}), 400
+
+    generate_report = request.headers.get('X-Generate-Report', 'false').lower() == 'true'
+
+    # Validate before touching the disk
+    file_type = get_file_type(original_name)
+
+    if not file_type:
+        return jsonify({'error': 'Invalid file type. Please upload an image, PDF, or code file.'}), 400
+
+    filename = secure_filename(original_name)
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    unique_filename = f"{timestamp}_{filename}"
+    filepath = config.sharded_path(app.config['UPLOAD_FOLDER'], unique_filename)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+    # Write the body in chunks so memory stays bounded regardless of upload size
+    file_size = 0
+    async with aiofiles.open(filepath, 'wb') as out:
+        async for chunk in request.body:
+            await out.write(chunk)
+            file_size += len(chunk)
+
+    return _queue_saved_file(filepath, filename, unique_filename, file_type, generate_report,
+                             now, file_size)
+
+
+def _save_stream(stream, filepath):
+    """Copy an upload stream to filepath and return the number of bytes written"""
+    with open(filepath, 'wb') as out:
+        shutil.copyfileobj(stream, out, UPLOAD_CHUNK_SIZE)
+        return out.tell()
+
+
+def _queue_saved_file(filepath, filename, unique_filename, file_type, generate_report,
+                      uploaded_at, file_size, fast=False):
+    """Build file info for an uploaded file and queue its analysis"""
 
     # Get file info
-    file_size = os.path.getsize(filepath)
     file_info = {
         'filename': filename,
         'unique_filename': unique_filename,
         'type': file_type,
         'size': get_file_size_readable(file_size),
         'size_bytes': file_size,
-        'upload_time': datetime.now().isoformat(),
+        'upload_time': uploaded_at.isoformat(),
         'analysis_type': 'Image Analysis' if file_type == 'image' else ('PDF Document Analysis' if file_type == 'pdf' else 'Code Analysis (AI Detection)')
     }
 
+    app.logger.info("Queued %s analysis for: %s", file_type, filename)
+    return _queue_analysis(unique_filename, filepath, file_type, file_info, generate_report,
+                           fast=fast)
+
+
+def _queue_analysis(analysis_id, filepath, file_type, file_info, generate_report,
+                    code_text=None, language='auto', fast=False):
+    """Submit an analysis to the worker pool and answer 202 with its id"""
+    # Mark it queued before submitting so the worker's 'running' is never overwritten
+    RESULT_STORE.set_queued(analysis_id)
+    future = EXECUTOR.submit(_run_analysis, analysis_id, filepath, file_type, file_info,
+                             generate_report, code_text, language, fast)
+    future.add_done_callback(partial(_store_outcome, analysis_id))
+
+    return jsonify({
+        'success': True,
+        'analysis_id': analysis_id,
+        'status': 'queued',
+        'message': 'Analysis queued'
+    }), 202
+
+
+def _store_outcome(analysis_id, future):
+    """Persist a finished analysis, or its error, to the shared result store"""
     try:
-        # Perform analysis based on file type
-        if file_type == 'image':
-            print(f"[*] Starting image analysis for: {filename}")
-            detector = ImageTamperingDetector(config.ANALYSIS_CONFIG, config.THRESHOLDS)
-            analysis_results = detector.analyze_image(filepath)
-        elif file_type == 'pdf':
-            print(f"[*] Starting PDF analysis for: {filename}")
+        RESULT_STORE.set_result(analysis_id, future.result())
+    except Exception as e:
+        app.logger.exception("Error during analysis %s", analysis_id)
+        RESULT_STORE.set_error(analysis_id, f'Analysis failed: {str(e)}')
+
+
+# Analyzers are built once per worker process on first use. Each worker runs
+# one analysis at a time, so the instances never see concurrent calls.
+_ANALYZERS = {}
+_worker_store = None
+
+
+def _get_analyzer(kind):
+    """Return this process's analyzer of the given kind, creating it if needed"""
+    analyzer = _ANALYZERS.get(kind)
+    if analyzer is None:
+        if kind == 'image':
+            analyzer = ImageTamperingDetector(config.ANALYSIS_CONFIG, config.THRESHOLDS)
+        elif kind == 'pdf':
             analyzer = PDFAnalyzer()
-            analysis_results = analyzer.analyze_pdf(filepath)
-        else:  # code
-            print(f"[*] Starting code analysis for: {filename}")
+        elif kind == 'code':
+            analyzer = CodeAnalyzer()
+        else:  # report
+            analyzer = ReportGenerator(config.REPORT_FOLDER)
+        _ANALYZERS[kind] = analyzer
+    return analyzer
+
+
+def _run_analysis(analysis_id, filepath, file_type, file_info, generate_report,
+                  code_text=None, language='auto', fast=False):
+    """Run the analyzer matching file_type in a worker process
+
+    Lives at module level so the process pool can pickle it by reference.
+    """
+    # Workers open their own connection to the shared store
+    global _worker_store
+    if _worker_store is None:
+        _worker_store = ResultStore(config.ANALYSIS_DB_PATH, ttl=config.ANALYSIS_RESULT_TTL,
+                                    cleanup_interval=None)
+    _worker_store.set_running(analysis_id)
+
+    # Perform analysis based on file type
+    if file_type == 'image':
+        logger.info("Starting image analysis for: %s", file_info['filename'])
+        analysis_results = _get_analyzer('image').analyze_image(filepath)
+    elif file_type == 'pdf':
+        logger.info("Starting PDF analysis for: %s", file_info['filename'])
+        analysis_results = _get_analyzer('pdf').analyze_pdf(filepath)
+    else:  # code
+        logger.info("Starting code analysis for: %s", file_info['filename'])
+        if code_text is None:
             with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
                 code_text = f.read()
-            analyzer = CodeAnalyzer()
-            analysis_results = analyzer.analyze_code(code_text)
+        analysis_results = _get_analyzer('code').analyze_code(code_text, language, fast=fast)
 
-        # Add file info to results
-        analysis_results['file_info'] = file_info
+    # Add file info to results
+    analysis_results['file_info'] = file_info
 
-        # Generate report only if requested
-        if generate_report:
-            report_gen = ReportGenerator(config.REPORT_FOLDER)
-            report_path = report_gen.generate_report(analysis_results, file_info)
-            analysis_results['report_path'] = report_path
-            analysis_results['report_filename'] = os.path.basename(report_path)
-        else:
-            analysis_results['report_path'] = None
-            analysis_results['report_filename'] = None
-
-        # Cache results
-        analysis_id = unique_filename
-        analysis_cache[analysis_id] = analysis_results
-
-        return jsonify({
-            'success': True,
-            'analysis_id': analysis_id,
-            'message': 'Analysis completed successfully'
-        })
+    # Generate report only if requested
+    if generate_report:
+        report_path = _get_analyzer('report').generate_report(analysis_results, file_info)
+        analysis_results['report_path'] = report_path
+        analysis_results['report_filename'] = os.path.basename(report_path)
+    else:
+        analysis_results['report_path'] = None
+        analysis_results['report_filename'] = None
 
-    except Exception as e:
-        print(f"[-] Error during analysis: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+    return analysis_results
 
 
 @app.route('/results/<analysis_id>')
-def get_results(analysis_id):
-    """Get analysis results"""
+async def get_results(analysis_id):
+    """Get analysis results, or the queued/running status until they are ready"""
+
+    entry = RESULT_STORE.get(analysis_id)
 
-    if analysis_id not in analysis_cache:
+    if entry is None:
         return jsonify({'error': 'Results not found'}), 404
 
-    results = analysis_cache[analysis_id]
+    status, results = entry
+
+    if status in ('queued', 'running'):
+        return jsonify({'status': status}), 202
+
+    if status == 'failed':
+        return jsonify(results), 500
 
     # Determine if this is code analysis or image/pdf analysis
     file_type = results.get('file_info', {}).get('type', '')
@@ -256,8 +443,10 @@ def get_results(analysis_id):
 
     # Prepare results for JSON serialization
     clean_results = {
+        'status': 'complete',
         'tampering_detected': tampering_detected,
         'confidence_score': results.get('confidence_score', 0.0),
+        'partial': results.get('partial', False),  # Fast mode skipped techniques
         'techniques_used': results.get('techniques_used', []),
         'findings': results.get('findings', []),
         'metadata_issues': results.get('metadata_issues', []),
@@ -270,29 +459,41 @@ def get_results(analysis_id):
         'language': results.get('language', '')
     }
 
-    return jsonify(clean_results)
+    return Response(orjson.dumps(clean_results, default=str, option=_ORJSON_OPTIONS),
+                    mimetype='application/json')
 
 
 @app.route('/download_report/<report_filename>')
-def download_report(report_filename):
+async def download_report(report_filename):
     """Download generated report"""
 
-    report_path = os.path.join(config.REPORT_FOLDER, secure_filename(report_filename))
+    safe_name = secure_filename(report_filename)
+    report_path = config.sharded_path(config.REPORT_FOLDER, safe_name)
 
     if not os.path.exists(report_path):
         return jsonify({'error': 'Report not found'}), 404
 
-    return send_file(report_path, as_attachment=True, download_name=report_filename)
+    # Let the front-end server stream the file with sendfile(2) when configured
+    headers = {'Content-Disposition': f'attachment; filename="{safe_name}"'}
+    if config.REPORT_ACCEL_REDIRECT:
+        relative_path = os.path.relpath(report_path, config.REPORT_FOLDER).replace(os.sep, '/')
+        headers['X-Accel-Redirect'] = f"{config.REPORT_ACCEL_REDIRECT.rstrip('/')}/{relative_path}"
+        return Response('', headers=headers, mimetype='application/pdf')
+    if config.USE_X_SENDFILE:
+        headers['X-Sendfile'] = os.path.abspath(report_path)
+        return Response('', headers=headers, mimetype='application/pdf')
+
+    return await send_file(report_path, as_attachment=True, download_name=report_filename)
 
 
 @app.route('/health')
-def health():
+async def health():
     """Health check endpoint for Render"""
-    return jsonify({'status': 'healthy'}), 200
+    return Response(HEALTH_BODY, status=200, mimetype='application/json')
 
 
 @app.route('/api/status')
-def api_status():
+async def api_status():
     """API health check"""
     return jsonify({
         'status': 'online',
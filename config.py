@@ -1,6 +1,7 @@
 """
 Configuration settings for Fraud Detection AI Agent
 """
+import hashlib
 import os
 
 # Application Settings
@@ -14,12 +15,31 @@ UPLOAD_FOLDER = 'uploads'
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'bmp', 'tiff', 'gif'}
 ALLOWED_PDF_EXTENSIONS = {'pdf'}
 ALLOWED_CODE_EXTENSIONS = {'py', 'js', 'java', 'cpp', 'c', 'cs', 'rb', 'go', 'php', 'ts', 'jsx', 'tsx', 'html', 'css', 'sql', 'sh', 'txt'}
+SUPPORTED_CODE_LANGUAGES = {'auto', 'python', 'javascript', 'java', 'c/c++', 'c#', 'ruby', 'go', 'php', 'typescript'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 MAX_CODE_SIZE = 5 * 1024 * 1024  # 5MB for code files
+UPLOAD_SPOOL_SIZE = 2 * 1024 * 1024  # Multipart parts above 2MB are spooled to disk
+
+# Worker Settings (the single web process owns one analysis pool of this size)
+ANALYSIS_WORKERS = int(os.getenv('KAYA_ANALYSIS_WORKERS', os.cpu_count() or 1))
+
+# Result Store Settings (SQLite file shared by the web process and the analysis workers)
+ANALYSIS_DB_PATH = os.getenv('KAYA_RESULTS_DB', os.path.join('temp', 'results.sqlite3'))
+ANALYSIS_RESULT_TTL = 3600  # Seconds before a stored analysis expires
+
+# Response Compression (PDF reports are already compressed and left alone)
+COMPRESS_MIMETYPES = {'application/json', 'text/html'}
+COMPRESS_LEVEL = 6
+COMPRESS_MIN_SIZE = 500  # Bytes; smaller bodies aren't worth the gzip framing
 
 # Report Settings
 REPORT_FOLDER = 'reports'
 REPORT_FORMAT = 'pdf'
+# Internal nginx location aliased to REPORT_FOLDER (e.g. '/_protected_reports/');
+# when set, downloads are handed to nginx via X-Accel-Redirect
+REPORT_ACCEL_REDIRECT = os.getenv('KAYA_REPORT_ACCEL_REDIRECT', '')
+# Emit X-Sendfile for Apache mod_xsendfile deployments
+USE_X_SENDFILE = os.getenv('KAYA_X_SENDFILE', 'False').lower() == 'true'
 
 # Detection Thresholds (LOWERED for higher sensitivity)
 THRESHOLDS = {
@@ -28,7 +48,8 @@ THRESHOLDS = {
     'forgery_confidence': 0.35,  # Lowered from 0.75 - flag suspicious images earlier
     'copy_move_threshold': 0.6,  # Lowered from 0.85 - detect more copy-move
     'noise_inconsistency': 0.4,  # Lowered from 0.6 - more sensitive to noise patterns
-    'ai_generated_threshold': 0.5  # New - for AI-generated image detection
+    'ai_generated_threshold': 0.5,  # New - for AI-generated image detection
+    'fast_mode_confidence': 0.95  # Fast mode stops running techniques at this confidence
 }
 
 # Model Paths
@@ -44,11 +65,27 @@ ANALYSIS_CONFIG = {
     'enable_copy_move': True,
     'enable_noise_analysis': True,
     'enable_deep_learning': True,
-    'enable_double_jpeg': True
+    'enable_double_jpeg': True,
+    'save_ela_viz': False,  # Write the equalized ELA map to temp/ela_result.jpg
+    'fast_mode': False,  # Stop early once confidence saturates (skips remaining techniques)
+    'max_analysis_dimension': 1024,  # Long edge (px) for feature techniques; ELA/JPEG stay full-res
+    # Threads per image; the ANALYSIS_WORKERS processes share the cores, so each gets its share
+    'technique_workers': max(1, min(8, (os.cpu_count() or 1) // ANALYSIS_WORKERS))
 }
 
-# Create necessary directories
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(REPORT_FOLDER, exist_ok=True)
-os.makedirs('models', exist_ok=True)
-os.makedirs('temp', exist_ok=True)
+
+def sharded_path(folder, filename):
+    """Place filename in a two-hex-digit subdirectory of folder derived from its name
+
+    Keeps any single directory small as uploads and reports accumulate. The shard
+    is a pure function of the filename, so it never needs to be stored.
+    """
+    shard = hashlib.blake2b(filename.encode('utf-8'), digest_size=1).hexdigest()
+    return os.path.join(folder, shard, filename)
+
+
+def ensure_directories():
+    """Create the working directories; called once at application startup"""
+    for folder in (UPLOAD_FOLDER, REPORT_FOLDER, 'models', 'temp'):
+        if not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
@@ -6,10 +6,14 @@ import re
 import ast
 import os
 import pickle
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support
 from collections import Counter
@@ -17,16 +21,112 @@ import json
 from datetime import datetime
 
 
+# Patterns used by extract_features, compiled once at import
+_IDENTIFIER_RE = re.compile(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b')
+_CAMEL_CASE_RE = re.compile(r'^[a-z]+([A-Z][a-z]*)+$')
+_FUNCTION_RE = re.compile(r'\bfunction\b|\bdef\b|\bpublic\s+\w+\s+\w+\(')
+_IMPORT_RE = re.compile(r'\bimport\b|\busing\b|\b#include\b')
+_TYPE_HINT_RE = re.compile(r'->\s*\w+|:\s*\w+\s*=')
+_INLINE_COMMENT_RE = re.compile(r'#[^\n]')  # A '#' with text after it on the same line
+_SPACED_OPERATOR_RE = re.compile(r'\s[\+\-\*\/\%]\s')
+_UNSPACED_OPERATOR_RE = re.compile(r'\S[\+\-\*\/\%]\S')
+
+# Comment syntax per language; anything else is treated like Python
+_PYTHON_COMMENT_RE = re.compile(r'#.*$', re.MULTILINE)
+_C_STYLE_COMMENT_RE = re.compile(r'//.*$|/\*[\s\S]*?\*/', re.MULTILINE)
+_COMMENT_RE = {
+    'python': _PYTHON_COMMENT_RE,
+    'javascript': _C_STYLE_COMMENT_RE,
+    'java': _C_STYLE_COMMENT_RE,
+    'c/c++': _C_STYLE_COMMENT_RE,
+    'c#': _C_STYLE_COMMENT_RE
+}
+
+# Part of every feature cache key; bump it whenever extract_features changes
+# so features stored by an older version are never reused
+_FEATURE_VERSION = 1
+
+# Training extracts features on worker processes once there are enough
+# samples to pay for starting them
+_FEATURE_WORKERS = os.cpu_count() or 1
+_PARALLEL_MIN_SAMPLES = 64
+
+# Phrases typical of AI-written explanations, matched against lowercased code
+_AI_PHRASES = (
+    'example usage',
+    'note:',
+    'alternatively',
+    'you can also',
+    'this function',
+    'this method',
+    'this class',
+    'helper function',
+    'utility function',
+    'main function'
+)
+
+
+class FeatureCache:
+    """Extracted features kept in a SQLite file, keyed by a hash of the code"""
+
+    # SQLite caps the number of bound parameters in one statement
+    _LOOKUP_BATCH = 500
+
+    def __init__(self, db_path):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # Analyses may run on web worker threads, so one connection is shared under a lock
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS features (key BLOB PRIMARY KEY, payload TEXT NOT NULL)')
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(code_text, language):
+        """Digest identifying code_text analyzed as language by this feature version"""
+        digest = hashlib.blake2b(f"{_FEATURE_VERSION}:{language}:".encode('utf-8'), digest_size=16)
+        digest.update(code_text.encode('utf-8', 'surrogatepass'))
+        return digest.digest()
+
+    def get_many(self, keys):
+        """Return {key: features} for the keys already stored"""
+        found = {}
+        for start in range(0, len(keys), self._LOOKUP_BATCH):
+            batch = keys[start:start + self._LOOKUP_BATCH]
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT key, payload FROM features WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+            found.update((key, json.loads(payload)) for key, payload in rows)
+        return found
+
+    def put_many(self, items):
+        """Store (key, features) pairs in a single transaction"""
+        rows = [(key, json.dumps(features)) for key, features in items]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO features(key, payload) VALUES (?, ?)', rows
+            )
+
+
 class MLCodeAnalyzer:
     """Machine Learning-based code analyzer for AI detection"""
 
-    def __init__(self, model_path='models/code_detector_v1.pkl'):
+    def __init__(self, model_path='models/code_detector_v1.pkl',
+                 feature_cache_path=os.path.join('temp', 'code_features.sqlite3')):
         self.model_path = model_path
         self.model = None
         self.vectorizer = None
         self.scaler = None
         self.feature_names = []
         
+        # Features of training files, reused across training runs (None disables
+        # this). Single analyses skip it, so the file only grows with the datasets.
+        self.feature_cache_path = feature_cache_path
+        self.feature_cache = None
+        
         # Try to load pre-trained model
         if os.path.exists(model_path):
             if not self.load_model():
@@ -38,10 +138,12 @@ class MLCodeAnalyzer:
     
     def initialize_model(self):
         """Initialize a new ML model"""
-        self.model = GradientBoostingClassifier(
-            n_estimators=200,
+        self.model = HistGradientBoostingClassifier(
+            max_iter=200,
             learning_rate=0.1,
             max_depth=5,
+            # Holding out a validation fraction costs too much accuracy on small datasets
+            early_stopping=False,
             random_state=42
         )
         self.vectorizer = TfidfVectorizer(
@@ -49,28 +151,40 @@ class MLCodeAnalyzer:
             ngram_range=(1, 3),
             token_pattern=r'\b\w+\b'
         )
-        self.scaler = StandardScaler()
+        # The trees bin every feature themselves, so no scaling is needed
+        self.scaler = None
+    
+    def _combine_features(self, feature_rows, tfidf, fit=False):
+        """Stack handcrafted feature rows and TF-IDF rows into the model's dense input matrix
+
+        Histogram boosting only takes dense input. Models saved with a scaler get
+        it applied (fitted first when fit is set).
+        """
+        combined = np.hstack([feature_rows, tfidf.toarray()])
+        if self.scaler is None:
+            return combined
+        return self.scaler.fit_transform(combined) if fit else self.scaler.transform(combined)
     
-    def extract_features(self, code_text, language='python'):
-        """Extract comprehensive features from code"""
+    @staticmethod
+    def extract_features(code_text, language='python'):
+        """Extract comprehensive features from code
+
+        Uses no analyzer state, so worker processes can run it by reference.
+        """
         features = {}
         
         # 1. Basic Code Metrics
         features['code_length'] = len(code_text)
-        features['line_count'] = len(code_text.split('\n'))
+        lines = code_text.split('\n')
+        features['line_count'] = len(lines)
         features['avg_line_length'] = features['code_length'] / max(features['line_count'], 1)
         
-        # 2. Comment Analysis
-        comment_patterns = {
-            'python': r'#.*$',
-            'javascript': r'//.*$|/\*[\s\S]*?\*/',
-            'java': r'//.*$|/\*[\s\S]*?\*/',
-            'c/c++': r'//.*$|/\*[\s\S]*?\*/',
-            'c#': r'//.*$|/\*[\s\S]*?\*/'
-        }
+        # Tally every identifier-like word once; the naming, class and error
+        # handling features below read this instead of rescanning the text
+        words = Counter(_IDENTIFIER_RE.findall(code_text))
         
-        pattern = comment_patterns.get(language, r'#.*$')
-        comments = re.findall(pattern, code_text, re.MULTILINE)
+        # 2. Comment Analysis
+        comments = _COMMENT_RE.get(language, _PYTHON_COMMENT_RE).findall(code_text)
         features['comment_count'] = len(comments)
         features['comment_ratio'] = len(''.join(comments)) / max(features['code_length'], 1)
         
@@ -79,32 +193,35 @@ class MLCodeAnalyzer:
         features['has_docstring'] = 1 if '"""' in code_text or "'''" in code_text else 0
         
         # 3. Structural Complexity
-        features['indentation_levels'] = self._count_indentation_levels(code_text)
+        indentation_levels, consistent_indentation = MLCodeAnalyzer._indentation_stats(lines)
+        features['indentation_levels'] = indentation_levels
         features['blank_line_ratio'] = code_text.count('\n\n') / max(features['line_count'], 1)
         
         # 4. Function/Class Analysis
         if language == 'python':
             try:
                 tree = ast.parse(code_text)
-                features['function_count'] = len([n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)])
-                features['class_count'] = len([n for n in ast.walk(tree) if isinstance(n, ast.ClassDef)])
-                features['import_count'] = len([n for n in ast.walk(tree) if isinstance(n, (ast.Import, ast.ImportFrom))])
+                node_types = Counter(type(node) for node in ast.walk(tree))
+                features['function_count'] = node_types[ast.FunctionDef]
+                features['class_count'] = node_types[ast.ClassDef]
+                features['import_count'] = node_types[ast.Import] + node_types[ast.ImportFrom]
             except:
                 features['function_count'] = code_text.count('def ')
                 features['class_count'] = code_text.count('class ')
                 features['import_count'] = code_text.count('import ')
         else:
-            features['function_count'] = len(re.findall(r'\bfunction\b|\bdef\b|\bpublic\s+\w+\s+\w+\(', code_text))
-            features['class_count'] = len(re.findall(r'\bclass\b', code_text))
-            features['import_count'] = len(re.findall(r'\bimport\b|\busing\b|\b#include\b', code_text))
+            features['function_count'] = len(_FUNCTION_RE.findall(code_text))
+            features['class_count'] = words['class']
+            features['import_count'] = len(_IMPORT_RE.findall(code_text))
         
         # 5. Naming Convention Analysis
-        identifiers = re.findall(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b', code_text)
-        if identifiers:
-            features['avg_identifier_length'] = np.mean([len(i) for i in identifiers])
-            features['camel_case_ratio'] = sum(1 for i in identifiers if re.match(r'^[a-z]+([A-Z][a-z]*)+$', i)) / len(identifiers)
-            features['snake_case_ratio'] = sum(1 for i in identifiers if '_' in i) / len(identifiers)
-            features['all_caps_ratio'] = sum(1 for i in identifiers if i.isupper()) / len(identifiers)
+        identifier_count = sum(words.values())
+        if identifier_count:
+            # Each distinct identifier is tested once and weighted by its count
+            features['avg_identifier_length'] = sum(len(i) * n for i, n in words.items()) / identifier_count
+            features['camel_case_ratio'] = sum(n for i, n in words.items() if _CAMEL_CASE_RE.match(i)) / identifier_count
+            features['snake_case_ratio'] = sum(n for i, n in words.items() if '_' in i) / identifier_count
+            features['all_caps_ratio'] = sum(n for i, n in words.items() if i.isupper()) / identifier_count
         else:
             features['avg_identifier_length'] = 0
             features['camel_case_ratio'] = 0
@@ -112,73 +229,59 @@ class MLCodeAnalyzer:
             features['all_caps_ratio'] = 0
         
         # 6. AI-Specific Patterns
-        ai_indicators = [
-            r'example usage',
-            r'note:',
-            r'alternatively',
-            r'you can also',
-            r'this function',
-            r'this method',
-            r'this class',
-            r'helper function',
-            r'utility function',
-            r'main function'
-        ]
-        features['ai_phrase_count'] = sum(1 for pattern in ai_indicators if re.search(pattern, code_text.lower()))
+        lowered = code_text.lower()
+        features['ai_phrase_count'] = sum(1 for phrase in _AI_PHRASES if phrase in lowered)
         
         # 7. Code Consistency
-        features['consistent_indentation'] = self._check_indentation_consistency(code_text)
-        features['whitespace_consistency'] = self._check_whitespace_consistency(code_text)
+        features['consistent_indentation'] = consistent_indentation
+        features['whitespace_consistency'] = MLCodeAnalyzer._check_whitespace_consistency(code_text)
         
         # 8. Keyword Density
         keywords = ['if', 'else', 'for', 'while', 'return', 'class', 'def', 'function', 'var', 'const', 'let']
         features['keyword_density'] = sum(code_text.count(kw) for kw in keywords) / max(features['code_length'], 1)
         
         # 9. Error Handling
-        features['try_catch_count'] = len(re.findall(r'\btry\b|\bcatch\b|\bexcept\b|\bfinally\b', code_text))
+        features['try_catch_count'] = words['try'] + words['catch'] + words['except'] + words['finally']
         features['error_handling_ratio'] = features['try_catch_count'] / max(features['function_count'], 1)
         
         # 10. Documentation Quality
-        features['has_type_hints'] = 1 if re.search(r'->\s*\w+|:\s*\w+\s*=', code_text) else 0
-        features['has_inline_comments'] = 1 if re.search(r'[^\n]*#[^\n]+', code_text) else 0
+        features['has_type_hints'] = 1 if _TYPE_HINT_RE.search(code_text) else 0
+        features['has_inline_comments'] = 1 if _INLINE_COMMENT_RE.search(code_text) else 0
         
         return features
     
-    def _count_indentation_levels(self, code_text):
-        """Count maximum indentation levels"""
-        max_indent = 0
-        for line in code_text.split('\n'):
-            if line.strip():
-                indent = len(line) - len(line.lstrip())
-                max_indent = max(max_indent, indent // 4 + 1)  # Assuming 4 spaces per level
-        return max_indent
-    
-    def _check_indentation_consistency(self, code_text):
-        """Check if indentation is consistent (AI code tends to be very consistent)"""
-        indents = []
-        for line in code_text.split('\n'):
-            if line.strip():
-                indent = len(line) - len(line.lstrip())
-                if indent > 0:
-                    indents.append(indent)
-        
-        if not indents:
-            return 1
+    @staticmethod
+    def _indentation_stats(lines):
+        """Return the maximum indentation level and the indentation consistency of the lines
+
+        Consistency is high when indents are multiples of a base unit (AI code
+        tends to be very consistent).
+        """
+        # Leading whitespace per line, measured in C by lstrip; blank lines are skipped
+        lengths = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+        content = np.fromiter(map(len, map(str.lstrip, lines)), dtype=np.int64, count=len(lines))
+        indents = (lengths - content)[content > 0]
+        
+        max_indent = int((indents // 4 + 1).max()) if indents.size else 0  # Assuming 4 spaces per level
+        
+        indents = indents[indents > 0]
+        if not indents.size:
+            return max_indent, 1
         
         # Check if indents are multiples of a base unit (2 or 4 spaces)
-        indent_set = set(indents)
-        if all(i % 4 == 0 for i in indent_set):
-            return 1  # Very consistent (AI-like)
-        elif all(i % 2 == 0 for i in indent_set):
-            return 0.8  # Fairly consistent
+        if not (indents % 4).any():
+            return max_indent, 1  # Very consistent (AI-like)
+        elif not (indents % 2).any():
+            return max_indent, 0.8  # Fairly consistent
         else:
-            return 0.5  # Inconsistent (human-like)
+            return max_indent, 0.5  # Inconsistent (human-like)
     
-    def _check_whitespace_consistency(self, code_text):
+    @staticmethod
+    def _check_whitespace_consistency(code_text):
         """Check whitespace around operators (AI is very consistent)"""
         # Check spaces around operators
-        operators_with_space = len(re.findall(r'\s[\+\-\*\/\%]\s', code_text))
-        operators_without_space = len(re.findall(r'\S[\+\-\*\/\%]\S', code_text))
+        operators_with_space = len(_SPACED_OPERATOR_RE.findall(code_text))
+        operators_without_space = len(_UNSPACED_OPERATOR_RE.findall(code_text))
         
         total = operators_with_space + operators_without_space
         if total == 0:
@@ -200,9 +303,8 @@ class MLCodeAnalyzer:
         
         # Get TF-IDF features
         try:
-            tfidf_features = self.vectorizer.transform([code_text]).toarray()
-            combined_features = np.hstack([feature_vector, tfidf_features])
-            combined_features = self.scaler.transform(combined_features)
+            tfidf_features = self.vectorizer.transform([code_text])
+            combined_features = self._combine_features(feature_vector, tfidf_features)
         except:
             combined_features = feature_vector
         
@@ -345,6 +447,55 @@ class MLCodeAnalyzer:
         
         return findings
     
+    def _open_feature_cache(self):
+        """Return the feature cache, opening it on first use (None if disabled)"""
+        if self.feature_cache is None and self.feature_cache_path:
+            try:
+                self.feature_cache = FeatureCache(self.feature_cache_path)
+            except (OSError, sqlite3.Error) as e:
+                print(f"[!] Feature cache unavailable: {e}")
+                self.feature_cache_path = None
+        return self.feature_cache
+    
+    def _extract_all(self, codes, language='python'):
+        """Extract the features of a training batch
+
+        Samples found in the feature cache are not extracted again; the rest run
+        on worker processes when there are enough of them, and are then cached.
+        """
+        cache = self._open_feature_cache()
+        if cache is None:
+            keys, cached = [None] * len(codes), {}
+        else:
+            keys = [FeatureCache.key(code, language) for code in codes]
+            try:
+                cached = cache.get_many(keys)
+            except sqlite3.Error as e:
+                print(f"[!] Feature cache lookup failed: {e}")
+                cached = {}
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        missing_codes = [codes[i] for i in missing]
+        
+        if _FEATURE_WORKERS > 1 and len(missing_codes) >= _PARALLEL_MIN_SAMPLES:
+            chunksize = max(1, len(missing_codes) // (_FEATURE_WORKERS * 4))
+            with ProcessPoolExecutor(max_workers=_FEATURE_WORKERS) as pool:
+                extracted = list(pool.map(self.extract_features, missing_codes, repeat(language), chunksize=chunksize))
+        else:
+            extracted = [self.extract_features(code, language) for code in missing_codes]
+        
+        if cache is None:
+            return extracted
+        
+        try:
+            cache.put_many((keys[i], features) for i, features in zip(missing, extracted))
+        except sqlite3.Error as e:
+            print(f"[!] Feature cache update failed: {e}")
+        
+        features_list = [cached.get(key) for key in keys]
+        for i, features in zip(missing, extracted):
+            features_list[i] = features
+        return features_list
+    
     def train(self, dataset_path='datasets/training'):
         """Train the model on a dataset"""
         print("[*] Loading training data...")
@@ -357,13 +508,8 @@ class MLCodeAnalyzer:
         print(f"[*] Training on {len(X_train)} samples...")
         
         # Extract features for all samples
-        features_list = []
-        texts = []
-        
-        for code, label in zip(X_train, y_train):
-            features = self.extract_features(code)
-            features_list.append(features)
-            texts.append(code)
+        features_list = self._extract_all(X_train)
+        texts = X_train
         
         # Store feature names
         self.feature_names = list(features_list[0].keys())
@@ -372,11 +518,10 @@ class MLCodeAnalyzer:
         X_features = np.array([[f[name] for name in self.feature_names] for f in features_list])
         
         # TF-IDF vectorization
-        tfidf_features = self.vectorizer.fit_transform(texts).toarray()
+        tfidf_features = self.vectorizer.fit_transform(texts)
         
         # Combine features
-        X_combined = np.hstack([X_features, tfidf_features])
-        X_combined = self.scaler.fit_transform(X_combined)
+        X_combined = self._combine_features(X_features, tfidf_features, fit=True)
         
         # Train model
         self.model.fit(X_combined, y_train)
@@ -384,18 +529,13 @@ class MLCodeAnalyzer:
         # Validate
         if len(X_val) > 0:
             print("[*] Validating model...")
-            val_features = []
-            val_texts = []
-            
-            for code, label in zip(X_val, y_val):
-                features = self.extract_features(code)
-                val_features.append([features[name] for name in self.feature_names])
-                val_texts.append(code)
+            val_features = [[features[name] for name in self.feature_names]
+                            for features in self._extract_all(X_val)]
+            val_texts = X_val
             
             X_val_features = np.array(val_features)
-            tfidf_val = self.vectorizer.transform(val_texts).toarray()
-            X_val_combined = np.hstack([X_val_features, tfidf_val])
-            X_val_combined = self.scaler.transform(X_val_combined)
+            tfidf_val = self.vectorizer.transform(val_texts)
+            X_val_combined = self._combine_features(X_val_features, tfidf_val)
             
             predictions = self.model.predict(X_val_combined)
             accuracy = accuracy_score(y_val, predictions)
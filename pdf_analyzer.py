@@ -15,7 +15,11 @@ class PDFAnalyzer:
     """Analyzes PDF documents for forgery and manipulation"""
 
     def __init__(self):
-        self.results = {
+        self.results = self._empty_results()
+
+    @staticmethod
+    def _empty_results():
+        return {
             'forgery_detected': False,
             'confidence_score': 0.0,
             'findings': [],
@@ -27,6 +31,7 @@ class PDFAnalyzer:
 
     def analyze_pdf(self, pdf_path):
         """Main PDF analysis pipeline"""
+        self.results = self._empty_results()
         print(f"[*] Analyzing PDF: {pdf_path}")
 
         try:
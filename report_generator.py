@@ -10,6 +10,7 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 from datetime import datetime
 import os
+import config
 
 
 class ReportGenerator:
@@ -25,7 +26,8 @@ class ReportGenerator:
         # Create filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         report_filename = f"fraud_detection_report_{timestamp}.pdf"
-        report_path = os.path.join(self.report_folder, report_filename)
+        report_path = config.sharded_path(self.report_folder, report_filename)
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
 
         # Create PDF
         doc = SimpleDocTemplate(report_path, pagesize=letter,
@@ -101,9 +103,13 @@ class ReportGenerator:
         status_color = colors.red if fraud_detected else colors.green
         confidence = analysis_results.get('confidence_score', 0.0)
 
+        confidence_text = f"{confidence:.1%}"
+        if analysis_results.get('partial'):
+            confidence_text += " (partial: fast mode skipped some techniques)"
+
         result_data = [
             ['Status:', status],
-            ['Confidence Score:', f"{confidence:.1%}"],
+            ['Confidence Score:', confidence_text],
             ['Risk Level:', self._get_risk_level(confidence)]
         ]
 
@@ -0,0 +1,91 @@
+"""
+Analysis Result Store
+SQLite-backed storage shared by the web process and the analysis workers
+"""
+import os
+import sqlite3
+import threading
+import time
+import orjson
+
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _dumps(obj):
+    """Serialize results with orjson, falling back to str() for unknown types"""
+    return orjson.dumps(obj, default=str, option=_ORJSON_OPTIONS)
+
+
+class ResultStore:
+    """Persists analysis status and results in a shared SQLite file"""
+
+    def __init__(self, db_path, ttl=3600, cleanup_interval=300):
+        self.db_path = db_path
+        self.ttl = ttl
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # Autocommit + WAL lets readers in other workers run alongside writers
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT, created REAL NOT NULL)'
+        )
+        self._lock = threading.Lock()
+
+        # Drop abandoned analyses in the background (workers pass None to skip this)
+        if cleanup_interval:
+            cleaner = threading.Thread(target=self._cleanup_loop, args=(cleanup_interval,), daemon=True)
+            cleaner.start()
+
+    def _write(self, analysis_id, status, payload):
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO results(id, status, payload, created) VALUES (?, ?, ?, ?)',
+                (analysis_id, status, payload, time.time())
+            )
+
+    def set_queued(self, analysis_id):
+        """Record that an analysis is waiting for a worker"""
+        self._write(analysis_id, 'queued', None)
+
+    def set_running(self, analysis_id):
+        """Record that a worker has started an analysis"""
+        self._write(analysis_id, 'running', None)
+
+    def set_result(self, analysis_id, results):
+        """Store the finished results of an analysis"""
+        self._write(analysis_id, 'complete', _dumps(results))
+
+    def set_error(self, analysis_id, message):
+        """Store the error message of a failed analysis"""
+        self._write(analysis_id, 'failed', _dumps({'error': message}))
+
+    def get(self, analysis_id):
+        """Return (status, payload) for an analysis, or None if unknown or expired"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT status, payload, created FROM results WHERE id = ?', (analysis_id,)
+            ).fetchone()
+
+        if row is None or time.time() - row[2] > self.ttl:
+            return None
+
+        status, payload, _ = row
+        return status, orjson.loads(payload) if payload else None
+
+    def purge_expired(self):
+        """Delete analyses older than the TTL"""
+        with self._lock:
+            self.conn.execute('DELETE FROM results WHERE created < ?', (time.time() - self.ttl,))
+
+    def _cleanup_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.purge_expired()
+            except sqlite3.Error as e:
+                print(f"[!] Result store cleanup failed: {e}")
@@ -0,0 +1,2 @@
+@echo off
+"%~dp0.venv312\Scripts\python.exe" "%~dp0app.py" %*
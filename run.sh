@@ -0,0 +1,4 @@
+#!/bin/sh
+# Start the app with the interpreter from the local .venv312
+HERE="$(cd "$(dirname "$0")" && pwd)"
+exec "$HERE/.venv312/bin/python" "$HERE/app.py" "$@"
@@ -0,0 +1,11 @@
+"""
+Pytest setup for the test/ directory
+Puts the project root on the import path and skips the non-pytest files
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# A live-server script (run it by hand against a running app) and sample inputs
+collect_ignore = ['test_code_analysis.py', 'test_code_ai_generated.py', 'test_code_human_written.py']
@@ -10,6 +10,16 @@ import os
 # Server URL
 BASE_URL = "http://localhost:5000"
 
+
+def wait_for_results(analysis_id, timeout=120):
+    """Poll /results until the queued analysis is no longer pending"""
+    deadline = time.time() + timeout
+    while True:
+        response = requests.get(f"{BASE_URL}/results/{analysis_id}")
+        if response.status_code != 202 or time.time() > deadline:
+            return response
+        time.sleep(1)
+
 def test_code_text_submission():
     """Test 1: Submit code via text area"""
     print("\n" + "="*60)
@@ -50,14 +60,13 @@ def calculate_fibonacci(n):
         print("[*] Submitting AI-generated code...")
         response = requests.post(f"{BASE_URL}/upload", data=data)
 
-        if response.status_code == 200:
+        if response.status_code in (200, 202):
             result = response.json()
             print(f"[+] Upload successful! Analysis ID: {result['analysis_id']}")
 
             # Get results
             print("[*] Fetching analysis results...")
-            time.sleep(1)
-            results_response = requests.get(f"{BASE_URL}/results/{result['analysis_id']}")
+            results_response = wait_for_results(result['analysis_id'])
 
             if results_response.status_code == 200:
                 results = results_response.json()
@@ -105,14 +114,13 @@ def test_code_file_upload():
             files = {'file': f}
             response = requests.post(f"{BASE_URL}/upload", files=files)
 
-        if response.status_code == 200:
+        if response.status_code in (200, 202):
             result = response.json()
             print(f"[+] Upload successful! Analysis ID: {result['analysis_id']}")
 
             # Get results
             print("[*] Fetching analysis results...")
-            time.sleep(1)
-            results_response = requests.get(f"{BASE_URL}/results/{result['analysis_id']}")
+            results_response = wait_for_results(result['analysis_id'])
 
             if results_response.status_code == 200:
                 results = results_response.json()
@@ -154,14 +162,13 @@ def test_human_written_code():
             files = {'file': f}
             response = requests.post(f"{BASE_URL}/upload", files=files)
 
-        if response.status_code == 200:
+        if response.status_code in (200, 202):
             result = response.json()
             print(f"[+] Upload successful! Analysis ID: {result['analysis_id']}")
 
             # Get results
             print("[*] Fetching analysis results...")
-            time.sleep(1)
-            results_response = requests.get(f"{BASE_URL}/results/{result['analysis_id']}")
+            results_response = wait_for_results(result['analysis_id'])
 
             if results_response.status_code == 200:
                 results = results_response.json()
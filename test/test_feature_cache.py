@@ -0,0 +1,48 @@
+"""
+Tests for the ML Feature Cache
+Checks that cached training features round-trip unchanged
+"""
+from ml_code_analyzer import FeatureCache, MLCodeAnalyzer
+
+
+SAMPLES = [
+    "import os\n\ndef main():\n    # Print the cwd\n    print(os.getcwd())\n",
+    "def add(a,b):\n    return a+b\n",
+    "function greet(name) {\n  return `Hi ${name}`;\n}\n",
+]
+
+
+def test_round_trip(tmp_path):
+    """Stored features come back equal and in the same key order"""
+    cache = FeatureCache(str(tmp_path / 'features.sqlite3'))
+    features = MLCodeAnalyzer.extract_features(SAMPLES[0])
+    key = FeatureCache.key(SAMPLES[0], 'python')
+
+    cache.put_many([(key, features)])
+    stored = cache.get_many([key, FeatureCache.key(SAMPLES[1], 'python')])
+    cache.conn.close()
+
+    assert list(stored) == [key]
+    assert stored[key] == features
+    assert list(stored[key]) == list(features)
+
+
+def test_key_includes_language():
+    """The same code analyzed as another language gets its own entry"""
+    assert FeatureCache.key(SAMPLES[0], 'python') != FeatureCache.key(SAMPLES[0], 'javascript')
+
+
+def test_training_batch_uses_cache(tmp_path):
+    """Cold and warm training batches match direct extraction; analyze() skips the cache"""
+    db_path = tmp_path / 'features.sqlite3'
+    analyzer = MLCodeAnalyzer(model_path=str(tmp_path / 'model.pkl'), feature_cache_path=str(db_path))
+    expected = [MLCodeAnalyzer.extract_features(code) for code in SAMPLES]
+
+    analyzer.model = None  # Untrained, so analyze() takes the heuristic path
+    analyzer.analyze(SAMPLES[0], 'python')
+    assert not db_path.exists()
+
+    assert analyzer._extract_all(SAMPLES) == expected  # cold
+    assert analyzer._extract_all(SAMPLES) == expected  # warm
+    assert len(analyzer.feature_cache.get_many([FeatureCache.key(code, 'python') for code in SAMPLES])) == 3
+    analyzer.feature_cache.conn.close()
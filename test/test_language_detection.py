@@ -0,0 +1,42 @@
+"""
+Tests for Code Language Detection
+Checks that long headers do not hide a file's language
+"""
+import configparser
+import heapq
+
+import pytest
+
+from code_analyzer import CodeAnalyzer, _LANGUAGE_HEAD_SIZE
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return CodeAnalyzer()
+
+
+def test_python_after_long_docstring(analyzer):
+    """Python whose module docstring is longer than the scanned head"""
+    docstring = '"""\n' + "This module implements a function for the heap queue.\n" * 100 + '"""\n'
+    code = docstring + "import sys\n\n\ndef main():\n    return sys.argv\n"
+    assert len(docstring) > _LANGUAGE_HEAD_SIZE
+    assert analyzer.detect_language(code) == 'python'
+
+
+@pytest.mark.parametrize('module', [heapq, configparser], ids=lambda module: module.__name__)
+def test_python_stdlib_modules(analyzer, module):
+    """Stdlib modules that open with multi-KiB docstrings"""
+    with open(module.__file__, encoding='utf-8') as f:
+        assert analyzer.detect_language(f.read()) == 'python'
+
+
+@pytest.mark.parametrize('code, language', [
+    ("const x = 1;\nfunction f() { return x; }\n", 'javascript'),
+    ("public class Main {\n}\n", 'java'),
+    ("#include <stdio.h>\nint main() { return 0; }\n", 'c/c++'),
+    ("using System;\nnamespace App {}\n", 'c#'),
+    ("plain text\n", 'unknown'),
+])
+def test_other_languages(analyzer, code, language):
+    """Non-Python sources keep their detection"""
+    assert analyzer.detect_language(code) == language
@@ -0,0 +1,54 @@
+"""
+Tests for the Analysis Result Store
+Checks status transitions and TTL expiry of stored analyses
+"""
+import time
+
+import pytest
+
+from result_store import ResultStore
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    stores = []
+
+    def make(ttl=3600):
+        store = ResultStore(str(tmp_path / 'results.sqlite3'), ttl=ttl, cleanup_interval=None)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.conn.close()
+
+
+def test_status_transitions(make_store):
+    """queued -> running -> complete, and failed with its message"""
+    store = make_store()
+    store.set_queued('a')
+    assert store.get('a') == ('queued', None)
+    store.set_running('a')
+    assert store.get('a') == ('running', None)
+    store.set_result('a', {'confidence_score': 0.5, 'findings': []})
+    assert store.get('a') == ('complete', {'confidence_score': 0.5, 'findings': []})
+
+    store.set_error('b', 'Analysis failed: boom')
+    assert store.get('b') == ('failed', {'error': 'Analysis failed: boom'})
+    assert store.get('missing') is None
+
+
+def test_ttl_expiry(make_store):
+    """Analyses older than the TTL read as unknown and are purged"""
+    store = make_store(ttl=0.2)
+    store.set_result('old', {'confidence_score': 1.0})
+    assert store.get('old') is not None
+
+    time.sleep(0.3)
+    store.set_queued('new')
+    assert store.get('old') is None
+    assert store.get('new') == ('queued', None)
+
+    store.purge_expired()
+    rows = store.conn.execute('SELECT id FROM results').fetchall()
+    assert rows == [('new',)]
@@ -0,0 +1,104 @@
+"""
+Tests for the Results Polling Contract
+Checks that /results answers 202 while pending, then 200 or 500 once finished
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import Future
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def app_module(tmp_path_factory):
+    """The app with its result store in a temp dir, started as serving would start it"""
+    db_path = str(tmp_path_factory.mktemp('results') / 'results.sqlite3')
+    previous = os.environ.get('KAYA_RESULTS_DB')
+    os.environ['KAYA_RESULTS_DB'] = db_path  # Read again by the spawned workers
+
+    import app as app_module
+    app_module.config.ANALYSIS_DB_PATH = db_path
+    asyncio.run(app_module.app.startup())
+    yield app_module
+
+    asyncio.run(app_module.app.shutdown())
+    if previous is None:
+        del os.environ['KAYA_RESULTS_DB']
+    else:
+        os.environ['KAYA_RESULTS_DB'] = previous
+
+
+def _get(app_module, analysis_id):
+    """Return (status_code, json body) of GET /results/<analysis_id>"""
+    async def request():
+        response = await app_module.app.test_client().get(f'/results/{analysis_id}')
+        return response.status_code, await response.get_json()
+    return asyncio.run(request())
+
+
+def _finish(app_module, analysis_id, result=None, error=None):
+    """Store the outcome of a finished worker the way the pool callback does"""
+    future = Future()
+    if error is None:
+        future.set_result(result)
+    else:
+        future.set_exception(error)
+    app_module._store_outcome(analysis_id, future)
+
+
+def test_pending_then_complete(app_module):
+    """202 with the status while queued or running, then 200 with the results"""
+    app_module.RESULT_STORE.set_queued('job-ok')
+    assert _get(app_module, 'job-ok') == (202, {'status': 'queued'})
+
+    app_module.RESULT_STORE.set_running('job-ok')
+    assert _get(app_module, 'job-ok') == (202, {'status': 'running'})
+
+    _finish(app_module, 'job-ok', result={
+        'ai_generated': True,
+        'confidence_score': 0.9,
+        'file_info': {'type': 'code', 'filename': 'sample.py'},
+    })
+    status_code, body = _get(app_module, 'job-ok')
+    assert status_code == 200
+    assert body['status'] == 'complete'
+    assert body['tampering_detected'] is True
+    assert body['confidence_score'] == 0.9
+
+
+def test_failed_job(app_module):
+    """A worker exception is reported as 500 with its message"""
+    app_module.RESULT_STORE.set_queued('job-failed')
+    _finish(app_module, 'job-failed', error=ValueError('boom'))
+    assert _get(app_module, 'job-failed') == (500, {'error': 'Analysis failed: boom'})
+
+
+def test_unknown_job(app_module):
+    """An id that was never queued is 404"""
+    assert _get(app_module, 'no-such-job') == (404, {'error': 'Results not found'})
+
+
+def test_code_upload_round_trip(app_module):
+    """A code submission answers 202, then polling /results reaches 200"""
+    async def upload():
+        response = await app_module.app.test_client().post(
+            '/upload', form={'code_text': 'def add(a, b):\n    return a + b\n', 'language': 'python'}
+        )
+        return response.status_code, await response.get_json()
+
+    status_code, body = asyncio.run(upload())
+    assert status_code == 202
+    assert body['status'] == 'queued'
+
+    # The first analysis also starts a worker process, which imports the analyzers
+    analysis_id = body['analysis_id']
+    deadline = time.time() + 120
+    status_code, body = _get(app_module, analysis_id)
+    while status_code == 202 and time.time() < deadline:
+        assert body['status'] in ('queued', 'running')
+        time.sleep(0.5)
+        status_code, body = _get(app_module, analysis_id)
+    assert status_code == 200
+    assert body['status'] == 'complete'
+    assert body['file_info']['type'] == 'code'